@@ -4,12 +4,16 @@ Provider pattern for OAuth-ready design. Currently implements local auth."""
 import os
 import uuid
 import secrets
+import hashlib
+import hmac
 import sqlite3
 import bcrypt
 import time
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, List, Any
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional, Dict, List, Any, Iterator
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent / "auth.db"
@@ -26,25 +30,104 @@ PERMISSIONS = {
 }
 
 VALID_ROLES = list(PERMISSIONS.keys())
+_PERMS_SET = {role: frozenset(perms) for role, perms in PERMISSIONS.items()}
+_ADMIN_ROLES = frozenset(role for role, perms in PERMISSIONS.items() if '*' in perms)
 
 # Rate limiting config
 MAX_FAILED_ATTEMPTS = 5
 RATE_LIMIT_WINDOW = 15 * 60  # 15 minutes
 LOCKOUT_DURATION = 30 * 60   # 30 minutes
 SESSION_EXPIRY_HOURS = 24
-
-
-def _get_db():
-    conn = sqlite3.connect(str(DB_PATH))
+SESSION_SWEEP_INTERVAL = 10 * 60  # delete expired sessions at most this often
+
+# bcrypt work factor (2^rounds). 12 is the conservative default; 10 (the
+# library default) gives ~4x login throughput. Tune per hardware.
+BCRYPT_ROUNDS = int(os.environ.get('EVIDENCE_BCRYPT_ROUNDS', '12'))
+
+
+# Verified against when the user is unknown/inactive so every login pays the
+# same bcrypt cost and response timing can't be used to enumerate usernames.
+# Hashed on first need rather than at import, which would cost a full bcrypt round.
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+
+# Hot-path statements. Kept as fixed strings so the long-lived per-thread
+# connection's statement cache serves them without re-preparing.
+_SQL_SESSION_USER = (
+    "SELECT u.id AS id, u.username, u.display_name, u.email, u.role, u.auth_provider, "
+    "u.created_at, u.last_login, u.is_active, s.token "
+    "FROM sessions s JOIN users u ON s.user_id=u.id "
+    "WHERE s.token=? AND s.expires_at>? AND u.is_active=1"
+)
+_SQL_USER_BY_ID = "SELECT * FROM users WHERE id=?"
+_SQL_USER_BY_NAME = "SELECT * FROM users WHERE username=?"
+_SQL_INSERT_ATTEMPT = "INSERT INTO login_attempts (username, ip_address, success, timestamp) VALUES (?,?,?,?)"
+_SQL_INSERT_SESSION = "INSERT INTO sessions (token, user_id, created_at, expires_at, ip_address, user_agent) VALUES (?,?,?,?,?,?)"
+_SQL_TOUCH_LAST_LOGIN = "UPDATE users SET last_login=? WHERE id=?"
+_SQL_REVOKE_SESSION = "DELETE FROM sessions WHERE token=?"
+_SQL_REVOKE_USER_SESSIONS = "DELETE FROM sessions WHERE user_id=?"
+_UPDATABLE_USER_FIELDS = ('display_name', 'email', 'role', 'is_active')
+# Fixed statement per field for the common single-field admin update
+_SQL_UPDATE_USER_FIELD = {f: f"UPDATE users SET {f}=? WHERE id=? RETURNING *" for f in _UPDATABLE_USER_FIELDS}
+_STATEMENT_CACHE_SIZE = 256
+# Row columns never exposed through _user_dict
+_PRIVATE_ROW_COLUMNS = ('auth_provider_id', 'token')
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a configured connection. PRAGMAs are applied once per connection."""
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False,
+                           cached_statements=_STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only risks the last commit on OS crash, not corruption
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA wal_autocheckpoint=1000")
+    conn.execute("PRAGMA journal_size_limit=6144000")
     conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-8000")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
 
-def init_db():
-    """Create auth tables if they don't exist."""
-    conn = _get_db()
+SCHEMA_VERSION = 2
+_initialized_dbs: set = set()  # DB paths whose schema was checked this process
+_init_lock = threading.Lock()
+
+# Timestamp columns that were ISO-8601 text before schema v2 (now epoch ints)
+_V2_EPOCH_COLUMNS = {
+    'users': ('created_at', 'last_login'),
+    'login_attempts': ('timestamp',),
+}
+
+
+def _iso(ts: Optional[int]) -> Optional[str]:
+    """Format an epoch-seconds column for API output."""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+def init_db(conn: sqlite3.Connection):
+    """Create auth tables if they don't exist, migrating older layouts."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    legacy = []
+    if version < 2:
+        # v1: sessions.expires_at became INTEGER. v2: every timestamp did.
+        # Sessions are short-lived, so recreate that table rather than
+        # convert rows; users/login_attempts are copied over below.
+        existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        conn.executescript("""
+            DROP TABLE IF EXISTS sessions;
+            DROP INDEX IF EXISTS idx_attempts_ip_ts;
+            DROP INDEX IF EXISTS idx_attempts_ip_ts_success;
+            DROP INDEX IF EXISTS idx_attempts_ts;
+        """)
+        for table in _V2_EPOCH_COLUMNS:
+            if table in existing:
+                conn.execute(f"ALTER TABLE {table} RENAME TO {table}_v1")
+                legacy.append(table)
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS users (
             id TEXT PRIMARY KEY,
@@ -55,15 +138,15 @@ def init_db():
             auth_provider TEXT DEFAULT 'local',
             auth_provider_id TEXT,
             password_hash TEXT,
-            created_at TEXT,
-            last_login TEXT,
+            created_at INTEGER,
+            last_login INTEGER,
             is_active INTEGER DEFAULT 1
         );
         CREATE TABLE IF NOT EXISTS sessions (
             token TEXT PRIMARY KEY,
             user_id TEXT NOT NULL REFERENCES users(id),
-            created_at TEXT,
-            expires_at TEXT,
+            created_at INTEGER,
+            expires_at INTEGER,
             ip_address TEXT,
             user_agent TEXT
         );
@@ -72,11 +155,60 @@ def init_db():
             username TEXT,
             ip_address TEXT,
             success INTEGER,
-            timestamp TEXT
+            timestamp INTEGER
         );
+        CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+        CREATE INDEX IF NOT EXISTS idx_attempts_ip_ts_success ON login_attempts(ip_address, timestamp, success);
+        CREATE INDEX IF NOT EXISTS idx_attempts_ts ON login_attempts(timestamp);
     """)
-    conn.commit()
-    conn.close()
+    with conn:
+        for table in legacy:
+            cols = [r['name'] for r in conn.execute(f"PRAGMA table_info({table})")]
+            epoch_cols = _V2_EPOCH_COLUMNS[table]
+            select = ", ".join(
+                f"CAST(strftime('%s', {c}) AS INTEGER)" if c in epoch_cols else c for c in cols
+            )
+            conn.execute(f"INSERT INTO {table} ({', '.join(cols)}) SELECT {select} FROM {table}_v1")
+            conn.execute(f"DROP TABLE {table}_v1")
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+def _hash_token(token: str) -> str:
+    """Sessions are stored by SHA-256 of the bearer token, never the token itself."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenBucket:
+    """Token bucket on the monotonic clock: `capacity` tokens refilled at
+    capacity/window per second. Each failed login spends one token."""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'last_update')
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / window
+        self.tokens = self.capacity
+        self.last_update = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+        self.last_update = now
+
+    def block_time(self) -> float:
+        """Seconds until a token is available (0 if not blocked)."""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Spend one token; returns the resulting block time."""
+        self._refill(time.monotonic())
+        self.tokens = max(0.0, self.tokens - 1)
+        return self.block_time()
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
 
 
 class AuthProvider:
@@ -91,7 +223,7 @@ class LocalAuthProvider(AuthProvider):
     """Username + bcrypt password authentication."""
 
     def hash_password(self, password: str) -> str:
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=12)).decode()
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
     def verify_password(self, password: str, password_hash: str) -> bool:
         try:
@@ -100,6 +232,14 @@ class LocalAuthProvider(AuthProvider):
             return False
 
 
+def _log_bcrypt_cost():
+    """Time one hash at the configured cost so operators can check it suits the hardware."""
+    start = time.perf_counter()
+    bcrypt.hashpw(b"benchmark", bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logging.getLogger('auth').info(f"BCRYPT_COST rounds={BCRYPT_ROUNDS} hash_ms={elapsed_ms:.0f}")
+
+
 class AuthManager:
     """Central auth manager with provider pattern."""
 
@@ -107,7 +247,41 @@ class AuthManager:
         self.providers: Dict[str, AuthProvider] = {
             'local': LocalAuthProvider(),
         }
-        init_db()
+        # One cached connection per thread instead of connect+PRAGMA per call
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        # Serialize writers in Python rather than spinning in SQLite's busy handler
+        self._write_lock = threading.Lock()
+        # Failed-login token bucket per IP; login_attempts is audit only
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._next_sweep = 0.0
+        with _init_lock:
+            if str(DB_PATH) not in _initialized_dbs:
+                init_db(self._get_db())
+                _initialized_dbs.add(str(DB_PATH))
+
+    def _get_db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = _connect()
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def close(self):
+        """Run PRAGMA optimize and close every per-thread connection."""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
 
     def _provider(self, name: str = 'local') -> AuthProvider:
         return self.providers[name]
@@ -125,71 +299,72 @@ class AuthManager:
 
         provider = self._provider('local')
         user_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
+        now = int(time.time())
         password_hash = provider.hash_password(password)
 
-        conn = _get_db()
+        conn = self._get_db()
         try:
-            conn.execute(
-                "INSERT INTO users (id, username, display_name, email, role, auth_provider, password_hash, created_at, is_active) VALUES (?,?,?,?,?,?,?,?,1)",
-                (user_id, username, display_name or username, email, role, 'local', password_hash, now)
-            )
-            conn.commit()
+            with self._write_lock, conn:
+                conn.execute(
+                    "INSERT INTO users (id, username, display_name, email, role, auth_provider, password_hash, created_at, is_active) VALUES (?,?,?,?,?,?,?,?,1)",
+                    (user_id, username, display_name or username, email, role, 'local', password_hash, now)
+                )
         except sqlite3.IntegrityError:
-            conn.close()
             raise ValueError(f"Username '{username}' already exists")
-        conn.close()
         logging.getLogger('auth').info(f"USER_CREATED username={username} role={role}")
         return {"id": user_id, "username": username, "role": role, "display_name": display_name or username}
 
     def get_user(self, user_id: str) -> Optional[dict]:
-        conn = _get_db()
-        row = conn.execute("SELECT * FROM users WHERE id=?", (user_id,)).fetchone()
-        conn.close()
+        row = self._get_db().execute(_SQL_USER_BY_ID, (user_id,)).fetchone()
         if not row:
             return None
         return self._user_dict(row)
 
     def get_user_by_username(self, username: str) -> Optional[dict]:
-        conn = _get_db()
-        row = conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
-        conn.close()
+        row = self._get_db().execute(_SQL_USER_BY_NAME, (username,)).fetchone()
         if not row:
             return None
         return self._user_dict(row, include_hash=True)
 
+    def iter_users(self, batch: int = 256) -> Iterator[dict]:
+        cur = self._get_db().execute("SELECT * FROM users ORDER BY created_at DESC")
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            for r in rows:
+                yield self._user_dict(r)
+
     def list_users(self) -> List[dict]:
-        conn = _get_db()
-        rows = conn.execute("SELECT * FROM users ORDER BY created_at DESC").fetchall()
-        conn.close()
-        return [self._user_dict(r) for r in rows]
+        return list(self.iter_users())
 
     def update_user(self, user_id: str, **kwargs) -> Optional[dict]:
-        allowed = {'display_name', 'email', 'role', 'is_active'}
-        updates = {k: v for k, v in kwargs.items() if k in allowed and v is not None}
+        updates = {k: v for k, v in kwargs.items() if k in _SQL_UPDATE_USER_FIELD and v is not None}
         if 'role' in updates and updates['role'] not in VALID_ROLES:
             raise ValueError(f"Invalid role: {updates['role']}")
         if not updates:
             return self.get_user(user_id)
 
-        sets = ", ".join(f"{k}=?" for k in updates)
-        vals = list(updates.values()) + [user_id]
-        conn = _get_db()
-        conn.execute(f"UPDATE users SET {sets} WHERE id=?", vals)
-        conn.commit()
-        conn.close()
-        user = self.get_user(user_id)
+        if len(updates) == 1:
+            (field, value), = updates.items()
+            sql, vals = _SQL_UPDATE_USER_FIELD[field], (value, user_id)
+        else:
+            sets = ", ".join(f"{k}=?" for k in updates)
+            sql, vals = f"UPDATE users SET {sets} WHERE id=? RETURNING *", list(updates.values()) + [user_id]
+        conn = self._get_db()
+        with self._write_lock, conn:
+            row = conn.execute(sql, vals).fetchone()
+        user = self._user_dict(row) if row else None
         if user:
             logging.getLogger('auth').info(f"USER_UPDATED target={user.get('username')} changes={list(updates.keys())}")
         return user
 
     def deactivate_user(self, user_id: str) -> bool:
-        conn = _get_db()
-        conn.execute("UPDATE users SET is_active=0 WHERE id=?", (user_id,))
-        # Revoke all sessions
-        conn.execute("DELETE FROM sessions WHERE user_id=?", (user_id,))
-        conn.commit()
-        conn.close()
+        conn = self._get_db()
+        with self._write_lock, conn:
+            conn.execute("UPDATE users SET is_active=0 WHERE id=?", (user_id,))
+            # Revoke all sessions
+            conn.execute(_SQL_REVOKE_USER_SESSIONS, (user_id,))
         return True
 
     def reset_password(self, user_id: str, new_password: str) -> bool:
@@ -197,13 +372,12 @@ class AuthManager:
             raise ValueError("Password must be at least 8 characters")
         provider = self._provider('local')
         password_hash = provider.hash_password(new_password)
-        conn = _get_db()
-        conn.execute("UPDATE users SET password_hash=? WHERE id=?", (password_hash, user_id))
-        conn.execute("DELETE FROM sessions WHERE user_id=?", (user_id,))
-        conn.commit()
-        conn.close()
-        user = self.get_user(user_id)
-        logging.getLogger('auth').info(f"PASSWORD_RESET target={user.get('username') if user else user_id}")
+        conn = self._get_db()
+        with self._write_lock, conn:
+            row = conn.execute("UPDATE users SET password_hash=? WHERE id=? RETURNING username",
+                               (password_hash, user_id)).fetchone()
+            conn.execute(_SQL_REVOKE_USER_SESSIONS, (user_id,))
+        logging.getLogger('auth').info(f"PASSWORD_RESET target={row['username'] if row else user_id}")
         return True
 
     # --- Authentication ---
@@ -220,6 +394,7 @@ class AuthManager:
 
         user = self.get_user_by_username(username)
         if not user or not user.get('is_active'):
+            self._provider('local').verify_password(password, _dummy_hash())
             reason = "unknown_user" if not user else "inactive_account"
             auth_log.warning(f"LOGIN_FAILED username={username} ip={ip} reason={reason}")
             self._log_attempt(username, ip, False)
@@ -238,15 +413,7 @@ class AuthManager:
 
         # Success
         auth_log.info(f"LOGIN_SUCCESS username={username} ip={ip}")
-        self._log_attempt(username, ip, True)
-        token = self._create_session(user['id'], ip, user_agent)
-
-        # Update last_login
-        conn = _get_db()
-        conn.execute("UPDATE users SET last_login=? WHERE id=?",
-                      (datetime.now(timezone.utc).isoformat(), user['id']))
-        conn.commit()
-        conn.close()
+        token = self._finalize_login(user['id'], ip, user_agent, username)
 
         safe_user = {k: v for k, v in user.items() if not k.startswith('_')}
         return {"token": token, "user": safe_user}
@@ -255,27 +422,26 @@ class AuthManager:
         """Validate session token, return user or None."""
         if not token:
             return None
-        conn = _get_db()
-        row = conn.execute(
-            "SELECT s.*, u.* FROM sessions s JOIN users u ON s.user_id=u.id WHERE s.token=? AND u.is_active=1",
-            (token,)
-        ).fetchone()
-        conn.close()
-        if not row:
-            return None
-        # Check expiry
-        expires = row['expires_at']
-        if expires and datetime.fromisoformat(expires) < datetime.now(timezone.utc):
-            self._revoke_session(token)
+        token_hash = _hash_token(token)
+        now = int(time.time())
+        if time.monotonic() >= self._next_sweep:
+            self._sweep_expired(now)
+        row = self._get_db().execute(_SQL_SESSION_USER, (token_hash, now)).fetchone()
+        if not row or not hmac.compare_digest(row['token'], token_hash):
             return None
         return self._user_dict(row)
 
     def logout(self, token: str) -> bool:
+        auth_log = logging.getLogger('auth')
+        conn = self._get_db()
+        with self._write_lock, conn:
+            row = conn.execute(_SQL_REVOKE_SESSION + " RETURNING user_id",
+                               (_hash_token(token),)).fetchone()
         # Log who's logging out
-        user = self.validate_session(token)
-        if user:
-            logging.getLogger('auth').info(f"LOGOUT username={user.get('username')}")
-        self._revoke_session(token)
+        if row and auth_log.isEnabledFor(logging.INFO):
+            user = conn.execute(_SQL_USER_BY_ID, (row['user_id'],)).fetchone()
+            if user:
+                auth_log.info(f"LOGOUT username={user['username']}")
         return True
 
     # --- Rate Limiting ---
@@ -283,85 +449,117 @@ class AuthManager:
     def _is_rate_limited(self, ip: str) -> bool:
         if not ip:
             return False
-        conn = _get_db()
-        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=RATE_LIMIT_WINDOW)).isoformat()
-        row = conn.execute(
-            "SELECT COUNT(*) as cnt FROM login_attempts WHERE ip_address=? AND success=0 AND timestamp>?",
-            (ip, cutoff)
-        ).fetchone()
-        conn.close()
-        return (row['cnt'] or 0) >= MAX_FAILED_ATTEMPTS
+        with self._buckets_lock:
+            bucket = self._buckets.get(ip)
+            if bucket is None:
+                return False
+            if bucket.is_full():
+                del self._buckets[ip]
+                return False
+            return bucket.block_time() > 0
+
+    def _record_failure(self, ip: str):
+        with self._buckets_lock:
+            bucket = self._buckets.get(ip)
+            if bucket is None:
+                bucket = self._buckets[ip] = TokenBucket(MAX_FAILED_ATTEMPTS, RATE_LIMIT_WINDOW)
+            bucket.acquire()
 
     def _log_attempt(self, username: str, ip: str, success: bool):
-        conn = _get_db()
-        conn.execute(
-            "INSERT INTO login_attempts (username, ip_address, success, timestamp) VALUES (?,?,?,?)",
-            (username, ip, int(success), datetime.now(timezone.utc).isoformat())
-        )
-        conn.commit()
-        conn.close()
+        if ip and not success:
+            self._record_failure(ip)
+        conn = self._get_db()
+        with self._write_lock, conn:
+            self._insert_attempt(conn, username, ip, success)
+
+    @staticmethod
+    def _insert_attempt(conn, username: str, ip: str, success: bool):
+        conn.execute(_SQL_INSERT_ATTEMPT, (username, ip, int(success), int(time.time())))
 
     # --- Sessions ---
 
     def _create_session(self, user_id: str, ip: str = None, user_agent: str = None) -> str:
-        token = secrets.token_hex(64)
-        now = datetime.now(timezone.utc)
-        expires = now + timedelta(hours=SESSION_EXPIRY_HOURS)
-        conn = _get_db()
-        conn.execute(
-            "INSERT INTO sessions (token, user_id, created_at, expires_at, ip_address, user_agent) VALUES (?,?,?,?,?,?)",
-            (token, user_id, now.isoformat(), expires.isoformat(), ip, user_agent)
-        )
-        conn.commit()
-        conn.close()
+        conn = self._get_db()
+        with self._write_lock, conn:
+            return self._insert_session(conn, user_id, ip, user_agent)
+
+    @staticmethod
+    def _insert_session(conn, user_id: str, ip: str = None, user_agent: str = None) -> str:
+        token = secrets.token_urlsafe(48)
+        now = int(time.time())
+        expires = now + SESSION_EXPIRY_HOURS * 3600
+        conn.execute(_SQL_INSERT_SESSION, (_hash_token(token), user_id, now, expires, ip, user_agent))
+        return token
+
+    def _finalize_login(self, user_id: str, ip: str, user_agent: str, username: str) -> str:
+        """Record the attempt, create the session and stamp last_login in one transaction."""
+        conn = self._get_db()
+        with self._write_lock, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._insert_attempt(conn, username, ip, True)
+            token = self._insert_session(conn, user_id, ip, user_agent)
+            conn.execute(_SQL_TOUCH_LAST_LOGIN, (int(time.time()), user_id))
         return token
 
     def _revoke_session(self, token: str):
-        conn = _get_db()
-        conn.execute("DELETE FROM sessions WHERE token=?", (token,))
-        conn.commit()
-        conn.close()
+        conn = self._get_db()
+        with self._write_lock, conn:
+            conn.execute(_SQL_REVOKE_SESSION, (_hash_token(token),))
+
+    def _sweep_expired(self, now: int):
+        """Delete expired sessions and forget idle rate-limit buckets."""
+        self._next_sweep = time.monotonic() + SESSION_SWEEP_INTERVAL
+        conn = self._get_db()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at<=?", (now,))
+        with self._buckets_lock:
+            for ip in [ip for ip, b in self._buckets.items() if b.is_full()]:
+                del self._buckets[ip]
 
     # --- Login History ---
 
-    def get_login_history(self, limit: int = 100) -> List[dict]:
-        conn = _get_db()
-        rows = conn.execute(
-            "SELECT * FROM login_attempts ORDER BY timestamp DESC LIMIT ?", (limit,)
-        ).fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+    def iter_login_history(self, limit: int = 100, offset: int = 0, batch: int = 256) -> Iterator[dict]:
+        cur = self._get_db().execute(
+            "SELECT * FROM login_attempts ORDER BY timestamp DESC LIMIT ? OFFSET ?", (limit, offset)
+        )
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            for r in rows:
+                d = dict(r)
+                d['timestamp'] = _iso(d['timestamp'])
+                yield d
+
+    def get_login_history(self, limit: int = 100, offset: int = 0) -> List[dict]:
+        return list(self.iter_login_history(limit, offset))
 
     # --- Helpers ---
 
     def _user_dict(self, row, include_hash: bool = False) -> dict:
-        d = {
-            "id": row["id"],
-            "username": row["username"],
-            "display_name": row["display_name"],
-            "email": row["email"],
-            "role": row["role"],
-            "auth_provider": row["auth_provider"],
-            "created_at": row["created_at"],
-            "last_login": row["last_login"],
-            "is_active": bool(row["is_active"]),
-        }
+        d = dict(row)
+        password_hash = d.pop("password_hash", None)
+        for col in _PRIVATE_ROW_COLUMNS:
+            d.pop(col, None)
+        d["created_at"] = _iso(d["created_at"])
+        d["last_login"] = _iso(d["last_login"])
+        d["is_active"] = bool(d["is_active"])
         if include_hash:
-            d["_password_hash"] = row["password_hash"]
+            d["_password_hash"] = password_hash
         return d
 
     def has_permission(self, user: dict, permission: str) -> bool:
         role = user.get('role', 'viewer')
-        perms = PERMISSIONS.get(role, [])
-        return '*' in perms or permission in perms
+        if role in _ADMIN_ROLES:
+            return True
+        return permission in _PERMS_SET.get(role, frozenset())
 
     # --- Initial Setup ---
 
     def ensure_admin_exists(self) -> Optional[str]:
         """Create default admin if no users exist. Returns password if created."""
-        conn = _get_db()
-        count = conn.execute("SELECT COUNT(*) as cnt FROM users").fetchone()['cnt']
-        conn.close()
+        _log_bcrypt_cost()
+        count = self._get_db().execute("SELECT COUNT(*) as cnt FROM users").fetchone()['cnt']
         if count > 0:
             return None
 
@@ -375,5 +573,22 @@ class AuthManager:
         return password
 
 
-# Singleton
-auth_manager = AuthManager()
+# Singleton, constructed on first use rather than at import
+_auth_manager: Optional[AuthManager] = None
+_auth_manager_lock = threading.Lock()
+
+
+def get_auth_manager() -> AuthManager:
+    global _auth_manager
+    if _auth_manager is None:
+        with _auth_manager_lock:
+            if _auth_manager is None:
+                _auth_manager = AuthManager()
+    return _auth_manager
+
+
+def __getattr__(name):
+    # Keeps `from auth import auth_manager` working
+    if name == 'auth_manager':
+        return get_auth_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,22 @@
 """Parse Cellebrite markdown files and AXIOM JSON into structured data.
-Uses line-by-line parsing (not regex) for performance on large files.
+Records are matched by precompiled MULTILINE regexes run over ~1MB chunks of each file.
 AXIOM data is loaded lazily (on demand) due to 2GB+ total size."""
 import os
 import re
 import json
+import pickle
+import sys
+import threading
 from pathlib import Path
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, namedtuple
+from itertools import accumulate, islice
+from bisect import bisect_right
+from concurrent.futures import Future, ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 CELLEBRITE_DIR = Path.home() / "clawd/tina-legal/cellebrite-parsed"
 AXIOM_DIR = Path.home() / "clawd/rag/inbox/axiom-extracts"
@@ -45,41 +56,238 @@ AXIOM_DEVICE_MAP = {
     "RMR035375_ASUSLaptop_TaintClear": {"owner": "Unknown", "type": "ASUS Laptop (TaintClear)"},
 }
 
+SEARCH_RESULT_LIMIT = 500
+# Parsed Cellebrite files are pickled here, keyed by source mtime and size.
+# Bump CACHE_VERSION whenever parser output changes shape.
+PARSE_CACHE_DIR = Path(os.environ.get("EVIDENCE_PARSE_CACHE_DIR", Path.home() / ".cache/evidence-browser"))
+CACHE_VERSION = 5
+# Parsed AXIOM files kept in memory, bounded by the on-disk size of the files
+AXIOM_CACHE_BYTES = int(os.environ.get("EVIDENCE_AXIOM_CACHE_BYTES", 1 << 30))
+
+# Thread messages are kept per message, as tuples rather than dicts
+ChatMsg = namedtuple("ChatMsg", "timestamp sender body source")
+
+CHAT_FIELDS = ChatMsg._fields
+CALL_FIELDS = ("timestamp", "direction", "status", "duration", "details")
+CONTACT_FIELDS = ("name", "source")
+BROWSE_FIELDS = ("timestamp", "title", "url", "browser")
+SEARCH_FIELDS = ("timestamp", "query", "source")
+EMAIL_FIELDS = ("timestamp", "subject", "from", "to", "source", "preview")
+LOCATION_FIELDS = ("timestamp", "coords", "address", "source")
+GENERIC_FIELDS = ("content",)
+
 CATEGORIES = ["browsing", "calls", "chats", "contacts", "emails", "locations", "notes", "passwords", "searches", "voicemails"]
 
-# Line-by-line parsers (fast)
+# Compiled once at import. Record patterns are MULTILINE and never cross a
+# newline, so they can be run over a whole chunk of a file (see _read_chunks)
+_CHAT_PAT = re.compile(r'^- \[(\d{4}-\d{2}-\d{2}T[^\]\n]+)\] \*\*([^*\n]*)\*\*: (.+)', re.M)
+_CALL_PAT = re.compile(r'^- \*\*(\d{4}-\d{2}-\d{2}T[^*\n]+)\*\* \| (\w+) \| (\w+) \| Duration: ([^ |\n]+)(.*)', re.M)
+_CONTACT_PAT = re.compile(r'^- \*\*([^*\n]+)\*\* \| Source: (.+)', re.M)
+_BROWSE_PAT = re.compile(r'^- \*\*(\d{4}-\d{2}-\d{2}T[^*\n]+)\*\* \| \[([^\]\n]*)\]\(([^)\n]*)\) \| (.+)', re.M)
+_SEARCH_PAT = re.compile(r'^- \*\*([^*\n]*)\*\* \| (.+?) \| (.+)', re.M)
+_LOC_PAT = re.compile(r'^- \*\*([^*\n]*)\*\* \| ([^|\n]*)\|(.+)', re.M)
+_THREAD_HEADER_PAT = re.compile(r'^### Chat: (.+)')
+_THREAD_STARTED_PAT = re.compile(r'^\*\*Started:\*\* (.+)')
+_EMAIL_HDR_PAT = re.compile(r'\*\*From:\*\*\s*(.*?)\s*→\s*\*\*To:\*\*\s*(.*)')
+_HTML_TAG_PAT = re.compile(r'<[^>]+>')
+
+_READ_CHUNK = 1 << 20
+
+# parse_emails states
+_EMAIL_SEEK, _EMAIL_NEED_FROM_TO, _EMAIL_NEED_SOURCE, _EMAIL_IN_PREVIEW = range(4)
+
+
+def _strip_tags(text):
+    """Remove <...> tags; most lines have none, so skip the regex for those."""
+    return _HTML_TAG_PAT.sub('', text) if '<' in text else text
+
+
+def _read_chunks(fpath):
+    """Yield fpath in ~1MB pieces, each completed to a line boundary.
+
+    Parsers run a MULTILINE findall over each piece, so non-record lines are
+    skipped inside the regex engine rather than by a Python loop per line.
+    """
+    with open(fpath, errors='replace', buffering=_READ_CHUNK) as f:
+        while True:
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                break
+            if not chunk.endswith('\n'):
+                chunk += f.readline()
+            yield chunk
+
+
+class RecordColumns:
+    """Struct-of-arrays storage for the parsed records of one category.
+
+    Each field is a parallel list, so a category costs a few lists instead
+    of a dict per record. Dicts are only built for records that are handed
+    out (record(i), indexing, slicing, iteration). blobs holds each record's
+    lowercased field values for substring search once build_blobs() runs.
+    """
+    __slots__ = ('fields', 'columns', 'blobs')
+
+    def __init__(self, fields, rows=()):
+        self.fields = fields
+        self.columns = [list(col) for col in zip(*rows)] if rows else [[] for _ in fields]
+        self.blobs = []
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __iter__(self):
+        fields = self.fields
+        for row in zip(*self.columns):
+            yield dict(zip(fields, row))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record(j) for j in range(*i.indices(len(self)))]
+        return self.record(i)
+
+    def column(self, name):
+        """The list of values for one field (empty strings if the category lacks it)."""
+        if name in self.fields:
+            return self.columns[self.fields.index(name)]
+        return [""] * len(self)
+
+    def record(self, i):
+        return dict(zip(self.fields, [col[i] for col in self.columns]))
+
+    def build_blobs(self):
+        self.blobs = ["\x00".join(row).lower() for row in zip(*self.columns)]
+
+
+def _matching_rows(cols, ql, date_from, date_to):
+    """Indices of the records in cols that pass the date range and lowercase query.
+
+    A plain range when nothing filters, otherwise a lazy generator.
+    """
+    rows = range(len(cols))
+    if date_from or date_to:
+        ts = cols.column('timestamp')
+        if date_from:
+            rows = (i for i in rows if (ts[i] or '') >= date_from)
+        if date_to:
+            date_to = date_to + 'T23:59:59'
+            rows = (i for i in rows if (ts[i] or '') <= date_to)
+    if ql:
+        blobs = cols.blobs
+        rows = (i for i in rows if ql in blobs[i])
+    return rows
+
+
+def _paginate(items, start, per_page):
+    """Return (items[start:start+per_page], total) without listing every match.
+
+    Lists and ranges are sliced directly. Iterators are walked once, keeping
+    only the requested page and counting the rest.
+    """
+    if start < 0 or isinstance(items, (list, range)):
+        if not isinstance(items, (list, range)):
+            items = list(items)
+        return items[start:start+per_page], len(items)
+    skipped = sum(1 for _ in islice(items, start))
+    page = list(islice(items, per_page))
+    return page, skipped + len(page) + sum(1 for _ in items)
+
+
+def _contains_ci(obj, needle):
+    """True if lowercase needle occurs in any scalar nested in a JSON value.
+
+    Walks dicts and lists and stops at the first matching leaf, instead of
+    serializing the whole record just to substring-test it.
+    """
+    if isinstance(obj, str):
+        return needle in obj.lower()
+    if isinstance(obj, dict):
+        obj = obj.values()
+    elif not isinstance(obj, list):
+        return needle in str(obj).lower()
+    for v in obj:
+        if _contains_ci(v, needle):
+            return True
+    return False
+
+
+def _read_json(fpath):
+    """Load a JSON file, with orjson when it is installed."""
+    with open(fpath, 'rb') as f:
+        raw = f.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity, which the stdlib parser accepts
+    return json.loads(raw)
+
+
+def _split_source(body):
+    """Split a stripped chat body into (text, source) on its trailing '(...)'."""
+    if body.endswith(')'):
+        # Only bodies ending in ')' can carry a source, so scan for '(' only then
+        idx = body.rfind('(', 0, -1)
+        if idx > 0:
+            return body[:idx].strip(), body[idx+1:-1]
+    return body, ""
+
+
+# Record parsers (fast)
 def parse_chats(fpath):
-    """Parse chat messages line by line."""
+    """Parse chat message records."""
     messages = []
-    pat = re.compile(r'^- \[(\d{4}-\d{2}-\d{2}T[^\]]+)\] \*\*([^*]*)\*\*: (.+)')
-    with open(fpath, errors='replace') as f:
-        for line in f:
-            m = pat.match(line)
-            if m:
-                ts, sender, body = m.group(1), m.group(2), m.group(3).strip()
-                # Extract source in trailing parens
-                idx = body.rfind('(')
-                if idx > 0 and body.endswith(')'):
-                    source = body[idx+1:-1]
-                    body = body[:idx].strip()
-                else:
-                    source = ""
-                messages.append({"timestamp": ts, "sender": sender, "body": body, "source": source})
-    return messages
+    findall = _CHAT_PAT.findall
+    split_source = _split_source
+    # Low-cardinality fields (senders, sources, call status...) repeat across
+    # records; parsers intern them so every record shares one str object
+    intern = sys.intern
+    for chunk in _read_chunks(fpath):
+        for ts, sender, body in findall(chunk):
+            body, source = split_source(body.strip())
+            messages.append((ts, intern(sender), body, intern(source)))
+    return RecordColumns(CHAT_FIELDS, messages)
 
 
 def parse_chat_threads(fpath):
-    """Parse chat file into thread structures with metadata."""
+    """Parse chat file into thread structures with metadata.
+
+    Returns (thread summaries, {thread_id: [ChatMsg]}, flat chat records).
+    """
     threads = []
     current_thread = None
     thread_id = 0
-    msg_pat = re.compile(r'^- \[(\d{4}-\d{2}-\d{2}T[^\]]+)\] \*\*([^*]*)\*\*: (.+)')
-    header_pat = re.compile(r'^### Chat: (.+)')
-    started_pat = re.compile(r'^\*\*Started:\*\* (.+)')
+    # Hot loop over every line: bind the matchers and the current thread's
+    # messages.append to locals
+    header_match = _THREAD_HEADER_PAT.match
+    started_match = _THREAD_STARTED_PAT.match
+    msg_match = _CHAT_PAT.match
+    split_source = _split_source
+    intern = sys.intern
+    msgs_append = None
 
     with open(fpath, errors='replace') as f:
         for line in f:
-            hm = header_pat.match(line)
+            # Message lines dominate; the three line kinds never share a prefix
+            if line.startswith('- ['):
+                mm = msg_match(line)
+                if not mm:
+                    continue
+                ts, sender, body = mm.groups()
+                body, source = split_source(body.strip())
+                if current_thread is None:
+                    thread_id += 1
+                    current_thread = {
+                        'thread_id': thread_id,
+                        'source': source or 'Unknown',
+                        'started': ts,
+                        'messages': [],
+                    }
+                    msgs_append = current_thread['messages'].append
+                msgs_append(ChatMsg(ts, intern(sender), body, intern(source)))
+                continue
+
+            hm = header_match(line)
             if hm:
                 if current_thread and current_thread['messages']:
                     threads.append(current_thread)
@@ -89,39 +297,14 @@ def parse_chat_threads(fpath):
                     'source': hm.group(1).strip(),
                     'started': '',
                     'messages': [],
-                    'participants': set(),
                 }
+                msgs_append = current_thread['messages'].append
                 continue
 
             if current_thread is not None:
-                sm = started_pat.match(line)
+                sm = started_match(line)
                 if sm:
                     current_thread['started'] = sm.group(1).strip()
-                    continue
-
-            mm = msg_pat.match(line)
-            if mm:
-                ts, sender, body = mm.group(1), mm.group(2), mm.group(3).strip()
-                idx = body.rfind('(')
-                if idx > 0 and body.endswith(')'):
-                    source = body[idx+1:-1]
-                    body = body[:idx].strip()
-                else:
-                    source = ""
-                if current_thread is None:
-                    thread_id += 1
-                    current_thread = {
-                        'thread_id': thread_id,
-                        'source': source or 'Unknown',
-                        'started': ts,
-                        'messages': [],
-                        'participants': set(),
-                    }
-                current_thread['messages'].append({
-                    'timestamp': ts, 'sender': sender, 'body': body, 'source': source
-                })
-                if sender:
-                    current_thread['participants'].add(sender)
 
     if current_thread and current_thread['messages']:
         threads.append(current_thread)
@@ -130,10 +313,13 @@ def parse_chat_threads(fpath):
     result = []
     for t in threads:
         msgs = t['messages']
-        participants = list(t['participants']) if t['participants'] else ['Unknown']
-        first_date = msgs[0]['timestamp'] if msgs else t.get('started', '')
-        last_date = msgs[-1]['timestamp'] if msgs else first_date
-        last_msg = msgs[-1]['body'][:150] if msgs else ''
+        # Distinct senders in order of first appearance
+        senders = dict.fromkeys(m.sender for m in msgs)
+        senders.pop('', None)
+        participants = list(senders) if senders else ['Unknown']
+        first_date = msgs[0].timestamp if msgs else t.get('started', '')
+        last_date = msgs[-1].timestamp if msgs else first_date
+        last_msg = msgs[-1].body[:150] if msgs else ''
         result.append({
             'thread_id': t['thread_id'],
             'source': t['source'],
@@ -142,104 +328,116 @@ def parse_chat_threads(fpath):
             'first_date': first_date,
             'last_date': last_date,
             'last_message_preview': last_msg,
+            # Lowercased searchable text for get_chat_threads
+            '_blob': "\x00".join([*participants, last_msg, t['source']]).lower(),
         })
-    return result, {t['thread_id']: t['messages'] for t in threads}
+    # Every message belongs to exactly one thread, in file order, so the flat
+    # chat records come from the same pass
+    flat = RecordColumns(CHAT_FIELDS, [m for t in threads for m in t['messages']])
+    return result, {t['thread_id']: t['messages'] for t in threads}, flat
 
 def parse_calls(fpath):
     calls = []
-    pat = re.compile(r'^- \*\*(\d{4}-\d{2}-\d{2}T[^*]+)\*\* \| (\w+) \| (\w+) \| Duration: ([^ |]+)(.*)')
-    with open(fpath, errors='replace') as f:
-        for line in f:
-            m = pat.match(line)
-            if m:
-                calls.append({"timestamp": m.group(1), "direction": m.group(2), "status": m.group(3), "duration": m.group(4), "details": m.group(5).strip(' |')})
-    return calls
+    findall = _CALL_PAT.findall
+    intern = sys.intern
+    for chunk in _read_chunks(fpath):
+        for ts, direction, status, duration, details in findall(chunk):
+            calls.append((ts, intern(direction), intern(status), duration, details.strip(' |')))
+    return RecordColumns(CALL_FIELDS, calls)
 
 def parse_contacts(fpath):
     contacts = []
-    pat = re.compile(r'^- \*\*([^*]+)\*\* \| Source: (.+)')
-    with open(fpath, errors='replace') as f:
-        for line in f:
-            m = pat.match(line)
-            if m:
-                contacts.append({"name": m.group(1), "source": m.group(2).strip()})
-    return contacts
+    findall = _CONTACT_PAT.findall
+    intern = sys.intern
+    for chunk in _read_chunks(fpath):
+        for name, source in findall(chunk):
+            contacts.append((name, intern(source.strip())))
+    return RecordColumns(CONTACT_FIELDS, contacts)
 
 def parse_browsing(fpath):
     entries = []
-    pat = re.compile(r'^- \*\*(\d{4}-\d{2}-\d{2}T[^*]+)\*\* \| \[([^\]]*)\]\(([^)]*)\) \| (.+)')
-    with open(fpath, errors='replace') as f:
-        for line in f:
-            m = pat.match(line)
-            if m:
-                entries.append({"timestamp": m.group(1), "title": m.group(2), "url": m.group(3), "browser": m.group(4).strip()})
-    return entries
+    findall = _BROWSE_PAT.findall
+    intern = sys.intern
+    for chunk in _read_chunks(fpath):
+        for ts, title, url, browser in findall(chunk):
+            entries.append((ts, title, url, intern(browser.strip())))
+    return RecordColumns(BROWSE_FIELDS, entries)
 
 def parse_searches(fpath):
     entries = []
-    pat = re.compile(r'^- \*\*([^*]*)\*\* \| (.+?) \| (.+)')
-    with open(fpath, errors='replace') as f:
-        for line in f:
-            m = pat.match(line)
-            if m:
-                entries.append({"timestamp": m.group(1), "query": m.group(2), "source": m.group(3).strip()})
-    return entries
+    findall = _SEARCH_PAT.findall
+    intern = sys.intern
+    for chunk in _read_chunks(fpath):
+        for ts, query, source in findall(chunk):
+            entries.append((ts, query, intern(source.strip())))
+    return RecordColumns(SEARCH_FIELDS, entries)
 
 def parse_emails(fpath):
-    """Parse emails - multiline, need to track state."""
+    """Parse emails - multiline, need to track state.
+
+    Streams the file: each header line starts an email, the next line is
+    From/To, an optional Source line follows, then preview text runs until
+    a '---' or '### ' line.
+    """
     emails = []
-    with open(fpath, errors='replace') as f:
-        lines = f.readlines()
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        if line.startswith('### ') and '—' in line:
-            # Parse: ### 2021-08-23T22:08:17+00:00 — Subject
-            parts = line[4:].split('—', 1)
-            ts = parts[0].strip()
-            subject = parts[1].strip() if len(parts) > 1 else ""
-            # Next line: **From:** ... → **To:** ...
-            i += 1
-            from_to = ""
-            source = ""
-            if i < len(lines):
-                ft_line = lines[i]
-                ft_match = re.match(r'\*\*From:\*\*\s*(.*?)\s*→\s*\*\*To:\*\*\s*(.*)', ft_line)
+    state = _EMAIL_SEEK
+    email = None
+    preview_buf = []
+    preview_len = 0
+    hdr_match = _EMAIL_HDR_PAT.match
+    with open(fpath, errors='replace', buffering=_READ_CHUNK) as f:
+        for line in f:
+            if state == _EMAIL_NEED_FROM_TO:
+                # Next line: **From:** ... → **To:** ... (consumed either way)
+                ft_match = hdr_match(line)
                 if ft_match:
-                    from_addr = ft_match.group(1).strip()
-                    to_addr = ft_match.group(2).strip()
-                else:
-                    from_addr = to_addr = ""
-                i += 1
-                if i < len(lines) and lines[i].startswith('**Source:**'):
-                    source = lines[i].replace('**Source:**', '').strip()
-                    i += 1
-            # Grab preview (skip HTML, get text)
-            preview = ""
-            while i < len(lines) and not lines[i].startswith('---') and not lines[i].startswith('### '):
-                clean = re.sub(r'<[^>]+>', '', lines[i]).strip()
-                if clean and len(preview) < 300:
-                    preview += clean + " "
-                i += 1
-            emails.append({"timestamp": ts, "subject": subject, "from": from_addr, "to": to_addr, "source": source, "preview": preview[:300].strip()})
-        else:
-            i += 1
-    return emails
+                    email[2] = ft_match.group(1).strip()
+                    email[3] = ft_match.group(2).strip()
+                state = _EMAIL_NEED_SOURCE
+                continue
+            if state == _EMAIL_NEED_SOURCE:
+                state = _EMAIL_IN_PREVIEW
+                if line.startswith('**Source:**'):
+                    email[4] = sys.intern(line.replace('**Source:**', '').strip())
+                    continue
+            if state == _EMAIL_IN_PREVIEW:
+                if not line.startswith('---') and not line.startswith('### '):
+                    # Grab preview (skip HTML, get text)
+                    if preview_len < 300:
+                        clean = _strip_tags(line).strip()
+                        if clean:
+                            preview_buf.append(clean)
+                            preview_len += len(clean) + 1
+                    continue
+                emails.append((*email, " ".join(preview_buf)[:300].strip()))
+                state = _EMAIL_SEEK
+            if line.startswith('### ') and '—' in line:
+                # Parse: ### 2021-08-23T22:08:17+00:00 — Subject
+                parts = line[4:].split('—', 1)
+                subject = parts[1].strip() if len(parts) > 1 else ""
+                # timestamp, subject, from, to, source
+                email = [parts[0].strip(), subject, "", "", ""]
+                preview_buf = []
+                preview_len = 0
+                state = _EMAIL_NEED_FROM_TO
+    if state != _EMAIL_SEEK:
+        emails.append((*email, " ".join(preview_buf)[:300].strip()))
+    return RecordColumns(EMAIL_FIELDS, emails)
 
 def parse_locations(fpath):
     entries = []
-    pat = re.compile(r'^- \*\*([^*]*)\*\* \| ([^|]*)\|(.+)')
-    with open(fpath, errors='replace') as f:
-        for line in f:
-            m = pat.match(line)
-            if m:
-                rest = m.group(3).strip()
-                parts = rest.split('|')
-                if len(parts) >= 2:
-                    entries.append({"timestamp": m.group(1), "coords": m.group(2).strip(), "address": parts[0].strip(), "source": parts[1].strip()})
-                else:
-                    entries.append({"timestamp": m.group(1), "coords": m.group(2).strip(), "address": "", "source": rest})
-    return entries
+    findall = _LOC_PAT.findall
+    intern = sys.intern
+    for chunk in _read_chunks(fpath):
+        for ts, coords, rest in findall(chunk):
+            coords = coords.strip()
+            rest = rest.strip()
+            parts = rest.split('|')
+            if len(parts) >= 2:
+                entries.append((ts, coords, parts[0].strip(), intern(parts[1].strip())))
+            else:
+                entries.append((ts, coords, "", rest))
+    return RecordColumns(LOCATION_FIELDS, entries)
 
 def parse_generic(fpath):
     entries = []
@@ -247,8 +445,8 @@ def parse_generic(fpath):
         for line in f:
             line = line.strip()
             if line.startswith('- '):
-                entries.append({"content": line[2:][:500]})
-    return entries
+                entries.append((line[2:][:500],))
+    return RecordColumns(GENERIC_FIELDS, entries)
 
 PARSERS = {
     "chats": parse_chats, "calls": parse_calls, "contacts": parse_contacts,
@@ -256,6 +454,99 @@ PARSERS = {
     "locations": parse_locations, "notes": parse_generic, "passwords": parse_generic, "voicemails": parse_generic,
 }
 
+def _run_inline(fn, *args):
+    """Call fn now and return its outcome as a completed Future."""
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _parse_cache_path(fpath, kind):
+    st = fpath.stat()
+    return PARSE_CACHE_DIR / f"{fpath.stem}.{kind}.v{CACHE_VERSION}.{st.st_mtime_ns}.{st.st_size}.pkl"
+
+
+def _cached_future(fpath, kind):
+    """Completed Future holding the cached parse of fpath, or None on a cache miss."""
+    try:
+        with open(_parse_cache_path(fpath, kind), 'rb') as f:
+            result = pickle.load(f)
+    except Exception:
+        return None  # missing, unreadable, or pickled by an incompatible version
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _store_parse_cache(fpath, kind, result):
+    """Pickle result for fpath and drop pickles of older versions of the file."""
+    try:
+        path = _parse_cache_path(fpath, kind)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        for old in path.parent.glob(f"{fpath.stem}.{kind}.*.pkl"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"  Could not cache {fpath.name}: {e}")
+
+
+def _parse_category(cat, fpath):
+    """Parse one Cellebrite category file and attach search blobs (runs in a worker process).
+
+    Returns (records, thread summaries, thread messages); the thread parts are
+    None except for chats, whose records and threads come from one pass.
+    """
+    if cat == 'chats':
+        thread_summaries, thread_messages, records = parse_chat_threads(fpath)
+    else:
+        records = PARSERS.get(cat, parse_generic)(fpath)
+        thread_summaries = thread_messages = None
+    records.build_blobs()
+    result = (records, thread_summaries, thread_messages)
+    _store_parse_cache(fpath, cat, result)
+    return result
+
+
+# Discovery keyword tiers (lowercase). A text containing any keyword becomes
+# a discovery; the highest tier present sets its flames.
+DISCOVERY_KEYWORDS_3 = ["trusted build", "delete signal", "erase", "password", "backup image", "gold hill"]
+DISCOVERY_KEYWORDS_2 = ["dominion", "griswold", "ballot", "adjudication", "mcua", "conan", "hayes", "backup"]
+DISCOVERY_KEYWORDS_1 = ["delete", "image"]
+_KW_RANK = {kw: 1 for kw in DISCOVERY_KEYWORDS_1}
+_KW_RANK.update({kw: 2 for kw in DISCOVERY_KEYWORDS_2})
+_KW_RANK.update({kw: 3 for kw in DISCOVERY_KEYWORDS_3})
+
+
+def _discovery_hits(texts):
+    """Return sorted (index, flames) pairs for the lowercase texts holding a keyword.
+
+    The texts are joined into one buffer and each keyword is located with
+    str.find over the whole buffer; keywords are rare, so nearly all of the
+    work is C-level substring search rather than per-text Python calls.
+    """
+    if not texts:
+        return []
+    buf = "\x00".join(texts)
+    starts = list(accumulate(len(t) + 1 for t in texts))
+    starts.insert(0, 0)
+    find = buf.find
+    ranks = {}
+    for kw, rank in _KW_RANK.items():
+        pos = find(kw)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            if ranks.get(i, 0) < rank:
+                ranks[i] = rank
+            pos = find(kw, pos + 1)
+    return sorted(ranks.items())
+
 
 class DataStore:
     def __init__(self):
@@ -265,6 +556,9 @@ class DataStore:
         self.axiom_index = {}
         self.devices = []
         self.stats = {}
+        self._axiom_cache = OrderedDict()  # (device_id, category) -> (mtime, size, records)
+        self._axiom_cache_bytes = 0
+        self._axiom_cache_lock = threading.Lock()
 
     def load_all(self):
         print("Loading Cellebrite data...")
@@ -275,28 +569,49 @@ class DataStore:
         print(f"Loaded {len(self.devices)} devices")
 
     def _load_cellebrite(self):
+        jobs = []
         for person_id in DEVICE_MAP:
             self.cellebrite_data[person_id] = {}
             for cat in CATEGORIES:
                 fpath = CELLEBRITE_DIR / f"{person_id}_{cat}.md"
                 if fpath.exists():
-                    parser = PARSERS.get(cat, parse_generic)
-                    try:
-                        records = parser(fpath)
-                    except Exception as e:
-                        print(f"  Error parsing {fpath.name}: {e}")
-                        records = []
-                    self.cellebrite_data[person_id][cat] = records
-                    print(f"  {person_id}/{cat}: {len(records)} records")
-                    # Also parse chat threads
-                    if cat == 'chats':
-                        try:
-                            thread_summaries, thread_messages = parse_chat_threads(fpath)
-                            self.chat_threads[person_id] = thread_summaries
-                            self.chat_thread_msgs[person_id] = thread_messages
-                            print(f"  {person_id}/chat-threads: {len(thread_summaries)} threads")
-                        except Exception as e:
-                            print(f"  Error parsing threads for {fpath.name}: {e}")
+                    jobs.append((person_id, cat, fpath))
+        if not jobs:
+            return
+
+        # Every file parses independently and parsing is CPU-bound, so spread
+        # the files across processes when there is more than one core to use.
+        # Files unchanged since their last parse come straight from the
+        # pickle cache.
+        workers = min(len(jobs), os.cpu_count() or 1)
+        pool = None
+
+        def submit(fn, *args):
+            nonlocal pool
+            if workers == 1:
+                return _run_inline(fn, *args)
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            return pool.submit(fn, *args)
+
+        try:
+            futures = [_cached_future(fpath, cat) or submit(_parse_category, cat, fpath)
+                       for _, cat, fpath in jobs]
+            for (person_id, cat, fpath), future in zip(jobs, futures):
+                try:
+                    records, thread_summaries, thread_messages = future.result()
+                except Exception as e:
+                    print(f"  Error parsing {fpath.name}: {e}")
+                    records, thread_summaries, thread_messages = RecordColumns(()), None, None
+                self.cellebrite_data[person_id][cat] = records
+                print(f"  {person_id}/{cat}: {len(records)} records")
+                if thread_summaries is not None:
+                    self.chat_threads[person_id] = thread_summaries
+                    self.chat_thread_msgs[person_id] = thread_messages
+                    print(f"  {person_id}/chat-threads: {len(thread_summaries)} threads")
+        finally:
+            if pool:
+                pool.shutdown()
 
     def _index_axiom(self):
         if not AXIOM_DIR.exists():
@@ -313,14 +628,33 @@ class DataStore:
 
     def _load_axiom_file(self, device_id, category):
         fpath = AXIOM_DIR / device_id / f"{category}.json"
-        if not fpath.exists():
+        try:
+            st = fpath.stat()
+        except OSError:
             return []
+        key = (device_id, category)
+        with self._axiom_cache_lock:
+            cached = self._axiom_cache.get(key)
+            if cached and cached[0] == st.st_mtime_ns:
+                self._axiom_cache.move_to_end(key)
+                return cached[2]
         try:
-            with open(fpath) as f:
-                data = json.load(f)
-            return data if isinstance(data, list) else [data]
+            data = _read_json(fpath)
         except Exception:
             return []
+        records = data if isinstance(data, list) else [data]
+        if st.st_size <= AXIOM_CACHE_BYTES:
+            with self._axiom_cache_lock:
+                old = self._axiom_cache.pop(key, None)
+                if old:
+                    self._axiom_cache_bytes -= old[1]
+                self._axiom_cache[key] = (st.st_mtime_ns, st.st_size, records)
+                self._axiom_cache_bytes += st.st_size
+                # Evict least recently used files until back under budget
+                while self._axiom_cache_bytes > AXIOM_CACHE_BYTES:
+                    _, (_, size, _) = self._axiom_cache.popitem(last=False)
+                    self._axiom_cache_bytes -= size
+        return records
 
     def _compute_stats(self):
         self.devices = []
@@ -361,46 +695,42 @@ class DataStore:
             threads = [t for t in threads if (t.get('first_date') or '') <= date_to + 'T23:59:59']
         if search:
             sl = search.lower()
-            threads = [t for t in threads if sl in str(t.get('participants', [])).lower() or sl in t.get('last_message_preview', '').lower() or sl in t.get('source', '').lower()]
+            threads = [t for t in threads if sl in t['_blob']]
         total = len(threads)
         start = (page - 1) * per_page
-        return {"threads": threads[start:start+per_page], "total": total, "page": page, "per_page": per_page}
+        page_threads = [{k: v for k, v in t.items() if k != '_blob'} for t in threads[start:start+per_page]]
+        return {"threads": page_threads, "total": total, "page": page, "per_page": per_page}
 
     def get_thread_messages(self, device_id, thread_id):
         msgs = self.chat_thread_msgs.get(device_id, {}).get(thread_id, [])
-        return {"messages": msgs, "total": len(msgs)}
+        return {"messages": [m._asdict() for m in msgs], "total": len(msgs)}
 
     def get_device_data(self, device_id, category=None, page=1, per_page=100, query=None, date_from=None, date_to=None):
         if device_id in self.cellebrite_data:
             data = self.cellebrite_data[device_id]
+            ql = query.lower() if query else None
+            start = (page - 1) * per_page
+            # Filter on the columns and only build dicts for the returned page
             if category:
-                records = data.get(category, [])
+                cols = data.get(category)
+                rows = _matching_rows(cols, ql, date_from, date_to) if cols else []
+                page_rows, total = _paginate(rows, start, per_page)
+                records = [cols.record(i) for i in page_rows]
             else:
-                records = []
-                for cat, recs in data.items():
-                    for r in recs:
-                        records.append({**r, "_category": cat})
-            # Date filtering
-            if date_from:
-                records = [r for r in records if (r.get('timestamp') or '') >= date_from]
-            if date_to:
-                records = [r for r in records if (r.get('timestamp') or '') <= date_to + 'T23:59:59']
-            if query:
-                ql = query.lower()
-                records = [r for r in records if ql in str(r).lower()]
-            total = len(records)
-            start = (page - 1) * per_page
-            return {"records": records[start:start+per_page], "total": total, "page": page, "per_page": per_page}
+                matches = ((cols, i, cat) for cat, cols in data.items()
+                           for i in _matching_rows(cols, ql, date_from, date_to))
+                page_matches, total = _paginate(matches, start, per_page)
+                records = [{**cols.record(i), "_category": cat} for cols, i, cat in page_matches]
+            return {"records": records, "total": total, "page": page, "per_page": per_page}
 
         if device_id in self.axiom_index:
             if category:
                 records = self._load_axiom_file(device_id, category)
                 if query:
                     ql = query.lower()
-                    records = [r for r in records if ql in json.dumps(r, default=str).lower()]
-                total = len(records)
-                start = (page - 1) * per_page
-                return {"records": records[start:start+per_page], "total": total, "page": page, "per_page": per_page}
+                    records = (r for r in records if _contains_ci(r, ql))
+                page_records, total = _paginate(records, (page - 1) * per_page, per_page)
+                return {"records": page_records, "total": total, "page": page, "per_page": per_page}
             else:
                 records = [{"_category": k, "record_count": v} for k, v in sorted(self.axiom_index[device_id].items()) if v > 0]
                 total = len(records)
@@ -410,26 +740,28 @@ class DataStore:
         return {"records": [], "total": 0, "page": page, "per_page": per_page}
 
     def search_all(self, query, device_filter=None, category_filter=None, page=1, per_page=50):
-        results = []
         ql = query.lower()
 
-        for device_id, cats in self.cellebrite_data.items():
-            if device_filter and device_id != device_filter:
-                continue
-            device_info = DEVICE_MAP.get(device_id, {})
-            for cat, records in cats.items():
-                if category_filter and cat != category_filter:
+        def matches():
+            for device_id, cats in self.cellebrite_data.items():
+                if device_filter and device_id != device_filter:
                     continue
-                for r in records:
-                    if ql in str(r).lower():
-                        results.append({
-                            "device_id": device_id, "device_name": device_info.get("name", device_id),
-                            "owner": device_info.get("owner", "Unknown"), "category": cat,
-                            "source": "cellebrite", "record": r
-                        })
-                        if len(results) >= 500:
-                            break
-
+                device_info = DEVICE_MAP.get(device_id, {})
+                dname = device_info.get("name", device_id)
+                downer = device_info.get("owner", "Unknown")
+                for cat, records in cats.items():
+                    if category_filter and cat != category_filter:
+                        continue
+                    for i, blob in enumerate(records.blobs):
+                        if ql in blob:
+                            yield {
+                                "device_id": device_id, "device_name": dname,
+                                "owner": downer, "category": cat,
+                                "source": "cellebrite", "record": records.record(i)
+                            }
+
+        # Stop scanning every device and category once the cap is reached
+        results = list(islice(matches(), SEARCH_RESULT_LIMIT))
         total = len(results)
         start = (page - 1) * per_page
         return {"results": results[start:start+per_page], "total": total, "page": page, "per_page": per_page}
@@ -439,67 +771,48 @@ class DataStore:
         """Scan parsed data for notable/interesting items."""
         discoveries = []
         disc_id = 0
-        keywords_3 = ["trusted build", "delete signal", "erase", "password", "backup image", "gold hill"]
-        keywords_2 = ["dominion", "griswold", "ballot", "adjudication", "mcua", "conan", "hayes", "backup"]
-        keywords_1 = ["delete", "password", "image"]
-
-        def flames_for(text):
-            tl = text.lower()
-            for kw in keywords_3:
-                if kw in tl:
-                    return 3
-            for kw in keywords_2:
-                if kw in tl:
-                    return 2
-            return 1
 
         def person_label(device_id):
             info = DEVICE_MAP.get(device_id, {})
             return info.get("owner", device_id)
 
-        all_keywords = keywords_3 + keywords_2 + ["delete", "image", "dominion", "ballot", "password"]
-
         for device_id, cats in self.cellebrite_data.items():
             owner = person_label(device_id)
 
             # Scan chats
-            for msg in cats.get("chats", []):
-                body = (msg.get("body") or "").lower()
-                for kw in all_keywords:
-                    if kw in body:
-                        disc_id += 1
-                        discoveries.append({
-                            "id": f"disc-{disc_id:04d}",
-                            "flames": flames_for(msg.get("body", "")),
-                            "title": f"{owner}: \"{msg.get('body', '')[:80]}\"",
-                            "category": "chats",
-                            "person": device_id,
-                            "person_name": owner,
-                            "content": msg.get("body", ""),
-                            "timestamp": msg.get("timestamp", ""),
-                            "source_file": f"{device_id}_chats.md",
-                            "sender": msg.get("sender", ""),
-                        })
-                        break
+            chats = cats.get("chats") or RecordColumns(CHAT_FIELDS)
+            for i, flames in _discovery_hits([(body or "").lower() for body in chats.column("body")]):
+                msg = chats[i]
+                disc_id += 1
+                discoveries.append({
+                    "id": f"disc-{disc_id:04d}",
+                    "flames": flames,
+                    "title": f"{owner}: \"{msg.get('body', '')[:80]}\"",
+                    "category": "chats",
+                    "person": device_id,
+                    "person_name": owner,
+                    "content": msg.get("body", ""),
+                    "timestamp": msg.get("timestamp", ""),
+                    "source_file": f"{device_id}_chats.md",
+                    "sender": msg.get("sender", ""),
+                })
 
             # Scan searches
-            for s in cats.get("searches", []):
-                query = (s.get("query") or "").lower()
-                for kw in all_keywords:
-                    if kw in query:
-                        disc_id += 1
-                        discoveries.append({
-                            "id": f"disc-{disc_id:04d}",
-                            "flames": flames_for(s.get("query", "")),
-                            "title": f"{owner} searched: \"{s.get('query', '')[:80]}\"",
-                            "category": "searches",
-                            "person": device_id,
-                            "person_name": owner,
-                            "content": s.get("query", ""),
-                            "timestamp": s.get("timestamp", ""),
-                            "source_file": f"{device_id}_searches.md",
-                        })
-                        break
+            searches = cats.get("searches") or RecordColumns(SEARCH_FIELDS)
+            for i, flames in _discovery_hits([(query or "").lower() for query in searches.column("query")]):
+                s = searches[i]
+                disc_id += 1
+                discoveries.append({
+                    "id": f"disc-{disc_id:04d}",
+                    "flames": flames,
+                    "title": f"{owner} searched: \"{s.get('query', '')[:80]}\"",
+                    "category": "searches",
+                    "person": device_id,
+                    "person_name": owner,
+                    "content": s.get("query", ""),
+                    "timestamp": s.get("timestamp", ""),
+                    "source_file": f"{device_id}_searches.md",
+                })
 
             # Scan passwords
             for p in cats.get("passwords", []):
@@ -518,27 +831,26 @@ class DataStore:
                 })
 
             # Scan emails
-            for e in cats.get("emails", []):
-                text = f"{e.get('subject', '')} {e.get('preview', '')}".lower()
-                for kw in all_keywords:
-                    if kw in text:
-                        disc_id += 1
-                        discoveries.append({
-                            "id": f"disc-{disc_id:04d}",
-                            "flames": flames_for(f"{e.get('subject', '')} {e.get('preview', '')}"),
-                            "title": f"{owner} email: \"{e.get('subject', '')[:80]}\"",
-                            "category": "emails",
-                            "person": device_id,
-                            "person_name": owner,
-                            "content": f"Subject: {e.get('subject', '')}\nFrom: {e.get('from', '')}\nTo: {e.get('to', '')}\n{e.get('preview', '')}",
-                            "timestamp": e.get("timestamp", ""),
-                            "source_file": f"{device_id}_emails.md",
-                        })
-                        break
+            emails = cats.get("emails") or RecordColumns(EMAIL_FIELDS)
+            texts = [f"{subject} {preview}".lower()
+                     for subject, preview in zip(emails.column("subject"), emails.column("preview"))]
+            for i, flames in _discovery_hits(texts):
+                e = emails[i]
+                disc_id += 1
+                discoveries.append({
+                    "id": f"disc-{disc_id:04d}",
+                    "flames": flames,
+                    "title": f"{owner} email: \"{e.get('subject', '')[:80]}\"",
+                    "category": "emails",
+                    "person": device_id,
+                    "person_name": owner,
+                    "content": f"Subject: {e.get('subject', '')}\nFrom: {e.get('from', '')}\nTo: {e.get('to', '')}\n{e.get('preview', '')}",
+                    "timestamp": e.get("timestamp", ""),
+                    "source_file": f"{device_id}_emails.md",
+                })
 
         # Sort by flames desc, then timestamp
-        discoveries.sort(key=lambda d: (-d["flames"], d.get("timestamp", "") or ""), reverse=False)
-        discoveries.sort(key=lambda d: -d["flames"])
+        discoveries.sort(key=lambda d: (-d["flames"], d["timestamp"] or ""))
         self._discoveries = discoveries
         print(f"  Found {len(discoveries)} discoveries")
         return discoveries
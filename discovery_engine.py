@@ -1,9 +1,13 @@
 """Discovery engine — scans parsed evidence for notable/groundbreaking findings.
 Works from PostgreSQL records table for speed."""
 import re
-import json
 from collections import defaultdict
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Key terms and their importance (flames 1-3)
 KEY_TERMS = {
     # 3 flames — critical case terms
@@ -20,6 +24,39 @@ KEY_TERMS = {
     "Jessi Romero": 1, "Judd Choate": 1,
 }
 
+# (lowercased term, term, flames), in KEY_TERMS order
+_KEY_TERMS_LOWER = [(term.lower(), term, flames) for term, flames in KEY_TERMS.items()]
+
+# With pyahocorasick installed, one automaton pass finds every key term in a text
+if ahocorasick is not None:
+    _KEY_TERM_AUTOMATON = ahocorasick.Automaton()
+    for _i, (_tl, _, _) in enumerate(_KEY_TERMS_LOWER):
+        _KEY_TERM_AUTOMATON.add_word(_tl, _i)
+    _KEY_TERM_AUTOMATON.make_automaton()
+else:
+    _KEY_TERM_AUTOMATON = None
+
+
+def _key_term_hits(text_lower):
+    """(term, flames) for each KEY_TERMS entry found in text_lower, in KEY_TERMS order."""
+    if _KEY_TERM_AUTOMATON is not None:
+        found = sorted({i for _, i in _KEY_TERM_AUTOMATON.iter(text_lower)})
+        return [_KEY_TERMS_LOWER[i][1:] for i in found]
+    return [(term, flames) for tl, term, flames in _KEY_TERMS_LOWER if tl in text_lower]
+
+# Delete/erase related searches, flagged at 3 flames. The short terms need word
+# boundaries; the lookahead lets one finditer pass report overlapping phrases.
+SUSPICIOUS_SEARCHES = ["how to delete", "clear history", "delete messages", "factory reset",
+                       "wipe", "erase", "remove evidence"]
+_SUSPICIOUS_SEARCH_RE = re.compile(
+    r"(?=(how to delete|clear history|delete messages|factory reset|\b(?:wipe|erase|remove evidence)\b))")
+
+
+def _suspicious_hits(q_lower):
+    """SUSPICIOUS_SEARCHES phrases found in q_lower, in list order."""
+    found = {m.group(1) for m in _SUSPICIOUS_SEARCH_RE.finditer(q_lower)}
+    return [phrase for phrase in SUSPICIOUS_SEARCHES if phrase in found] if found else []
+
 # Critical dates
 CRITICAL_DATES = {
     "2021-05-23": ("Trusted Build Weekend", 3),
@@ -37,6 +74,7 @@ CRITICAL_DATES = {
 # Key people for cross-device connections
 KEY_PEOPLE = ["Tina Peters", "Tina", "Wendi", "Woods", "Gerald Wood", "Sherronna", "Bishop",
               "Sandra Brown", "Sandye", "Belinda", "Knisley", "Joy Quinn", "Zachary"]
+_KEY_PEOPLE_LOWER = tuple(kp.lower() for kp in KEY_PEOPLE)
 
 # Pre-seeded verified discoveries
 VERIFIED_DISCOVERIES = [
@@ -133,17 +171,12 @@ def scan_discoveries(cellebrite_data, device_map):
                 continue
 
             # Check key terms (body text only, not source metadata)
-            matched_terms = []
-            max_flames = 0
-            body_lower = body.lower()
-            for term, flames in KEY_TERMS.items():
-                tl = term.lower()
-                if tl in body_lower:
-                    # Skip common app names that appear as attribution
-                    if tl in ("signal", "telegram") and len(body) < 30:
-                        continue
-                    matched_terms.append(term)
-                    max_flames = max(max_flames, flames)
+            hits = _key_term_hits(body.lower())
+            if len(body) < 30:
+                # Skip common app names that appear as attribution
+                hits = [(term, flames) for term, flames in hits if term.lower() not in ("signal", "telegram")]
+            matched_terms = [term for term, _ in hits]
+            max_flames = max((flames for _, flames in hits), default=0)
 
             if matched_terms and max_flames >= 2:
                 disc_id += 1
@@ -163,23 +196,24 @@ def scan_discoveries(cellebrite_data, device_map):
                 })
 
             # Check critical dates
-            for date_str, (label, flames) in CRITICAL_DATES.items():
-                if ts and ts.startswith(date_str):
-                    disc_id += 1
-                    discoveries.append({
-                        "id": f"date-{device_id}-{disc_id}",
-                        "title": f"{owner}: Message on {label} ({date_str})",
-                        "category": "Communications",
-                        "flames": flames,
-                        "device_id": device_id,
-                        "owner": owner,
-                        "content": body[:500],
-                        "timestamp": ts,
-                        "verified": False,
-                        "tags": [label, date_str],
-                        "data_type": "chats",
-                        "source_app": msg.get("source", ""),
-                    })
+            date_str = ts[:10] if ts else None
+            if date_str in CRITICAL_DATES:
+                label, flames = CRITICAL_DATES[date_str]
+                disc_id += 1
+                discoveries.append({
+                    "id": f"date-{device_id}-{disc_id}",
+                    "title": f"{owner}: Message on {label} ({date_str})",
+                    "category": "Communications",
+                    "flames": flames,
+                    "device_id": device_id,
+                    "owner": owner,
+                    "content": body[:500],
+                    "timestamp": ts,
+                    "verified": False,
+                    "tags": [label, date_str],
+                    "data_type": "chats",
+                    "source_app": msg.get("source", ""),
+                })
 
         # --- EMAILS: Key term mentions ---
         emails = categories.get("emails", [])
@@ -189,12 +223,9 @@ def scan_discoveries(cellebrite_data, device_map):
             ts = email.get("timestamp", "")
             text = f"{subject} {preview}".lower()
 
-            matched_terms = []
-            max_flames = 0
-            for term, flames in KEY_TERMS.items():
-                if term.lower() in text:
-                    matched_terms.append(term)
-                    max_flames = max(max_flames, flames)
+            hits = _key_term_hits(text)
+            matched_terms = [term for term, _ in hits]
+            max_flames = max((flames for _, flames in hits), default=0)
 
             if matched_terms and max_flames >= 2:
                 disc_id += 1
@@ -219,23 +250,15 @@ def scan_discoveries(cellebrite_data, device_map):
             ts = s.get("timestamp", "")
             q_lower = query.lower()
 
-            matched = []
-            max_flames = 0
-            for term, flames in KEY_TERMS.items():
-                if term.lower() in q_lower:
-                    matched.append(term)
-                    max_flames = max(max_flames, flames)
+            hits = _key_term_hits(q_lower)
+            matched = [term for term, _ in hits]
+            max_flames = max((flames for _, flames in hits), default=0)
 
-            # Also flag delete/erase related searches (word boundary)
-            for suspicious in ["how to delete", "clear history", "delete messages", "factory reset"]:
-                if suspicious in q_lower:
-                    matched.append(suspicious)
-                    max_flames = max(max_flames, 3)
-            # Word-boundary matches for short terms
-            for suspicious in ["wipe", "erase", "remove evidence"]:
-                if re.search(r'\b' + re.escape(suspicious) + r'\b', q_lower):
-                    matched.append(suspicious)
-                    max_flames = max(max_flames, 3)
+            # Also flag delete/erase related searches
+            suspicious = _suspicious_hits(q_lower)
+            if suspicious:
+                matched.extend(suspicious)
+                max_flames = 3
 
             if matched:
                 disc_id += 1
@@ -277,45 +300,45 @@ def scan_discoveries(cellebrite_data, device_map):
         for loc in locations:
             ts = loc.get("timestamp", "")
             address = loc.get("address", "")
-            for date_str, (label, flames) in CRITICAL_DATES.items():
-                if ts and ts.startswith(date_str):
-                    disc_id += 1
-                    discoveries.append({
-                        "id": f"loc-{device_id}-{disc_id}",
-                        "title": f"{owner}: Location on {label} ({date_str})",
-                        "category": "Locations",
-                        "flames": flames,
-                        "device_id": device_id,
-                        "owner": owner,
-                        "content": f"Location: {address or loc.get('coords', 'Unknown')}\nSource: {loc.get('source', '')}\nTime: {ts}",
-                        "timestamp": ts,
-                        "verified": False,
-                        "tags": [label, "location"],
-                        "data_type": "locations",
-                    })
-                    break  # Only one discovery per location
+            date_str = ts[:10] if ts else None
+            if date_str in CRITICAL_DATES:
+                label, flames = CRITICAL_DATES[date_str]
+                disc_id += 1
+                discoveries.append({
+                    "id": f"loc-{device_id}-{disc_id}",
+                    "title": f"{owner}: Location on {label} ({date_str})",
+                    "category": "Locations",
+                    "flames": flames,
+                    "device_id": device_id,
+                    "owner": owner,
+                    "content": f"Location: {address or loc.get('coords', 'Unknown')}\nSource: {loc.get('source', '')}\nTime: {ts}",
+                    "timestamp": ts,
+                    "verified": False,
+                    "tags": [label, "location"],
+                    "data_type": "locations",
+                })
 
         # --- CALLS: Critical dates ---
         calls = categories.get("calls", [])
         for call in calls:
             ts = call.get("timestamp", "")
-            for date_str, (label, flames) in CRITICAL_DATES.items():
-                if ts and ts.startswith(date_str):
-                    disc_id += 1
-                    discoveries.append({
-                        "id": f"call-{device_id}-{disc_id}",
-                        "title": f"{owner}: {call.get('direction', '')} call on {label}",
-                        "category": "Communications",
-                        "flames": flames,
-                        "device_id": device_id,
-                        "owner": owner,
-                        "content": f"Direction: {call.get('direction', '')}\nStatus: {call.get('status', '')}\nDuration: {call.get('duration', '')}\nDetails: {call.get('details', '')}\nTime: {ts}",
-                        "timestamp": ts,
-                        "verified": False,
-                        "tags": [label, "call", call.get("direction", "")],
-                        "data_type": "calls",
-                    })
-                    break
+            date_str = ts[:10] if ts else None
+            if date_str in CRITICAL_DATES:
+                label, flames = CRITICAL_DATES[date_str]
+                disc_id += 1
+                discoveries.append({
+                    "id": f"call-{device_id}-{disc_id}",
+                    "title": f"{owner}: {call.get('direction', '')} call on {label}",
+                    "category": "Communications",
+                    "flames": flames,
+                    "device_id": device_id,
+                    "owner": owner,
+                    "content": f"Direction: {call.get('direction', '')}\nStatus: {call.get('status', '')}\nDuration: {call.get('duration', '')}\nDetails: {call.get('details', '')}\nTime: {ts}",
+                    "timestamp": ts,
+                    "verified": False,
+                    "tags": [label, "call", call.get("direction", "")],
+                    "data_type": "calls",
+                })
 
         # --- BROWSING: Critical dates + suspicious ---
         browsing = categories.get("browsing", [])
@@ -325,12 +348,9 @@ def scan_discoveries(cellebrite_data, device_map):
             url = b.get("url", "")
             text = f"{title} {url}".lower()
 
-            matched = []
-            max_flames = 0
-            for term, flames in KEY_TERMS.items():
-                if term.lower() in text:
-                    matched.append(term)
-                    max_flames = max(max_flames, flames)
+            hits = _key_term_hits(text)
+            matched = [term for term, _ in hits]
+            max_flames = max((flames for _, flames in hits), default=0)
 
             if matched and max_flames >= 2:
                 disc_id += 1
@@ -365,7 +385,8 @@ def scan_discoveries(cellebrite_data, device_map):
         unique_devices = list(set(devices))
         if len(unique_devices) > 1:
             # Check if it's a key person
-            is_key = any(kp.lower() in name.lower() for kp in KEY_PEOPLE)
+            name_lower = name.lower()
+            is_key = any(kp in name_lower for kp in _KEY_PEOPLE_LOWER)
             flames = 3 if is_key else 1
             if flames >= 2 or len(unique_devices) >= 3:
                 disc_id += 1
@@ -435,6 +456,45 @@ def get_discoveries(cellebrite_data, device_map, category="all", person="all", s
     return all_disc
 
 
+# Batched scan queries: one round-trip per rule for every device/term/date at once.
+# LATERAL keeps the per-(device, term) LIMIT the old per-term queries had.
+_TERM_MATCHES_SQL = """
+    SELECT dev.device_id, t.term, r.data, r.timestamp, r.category
+    FROM unnest(%s::text[]) AS dev(device_id)
+    CROSS JOIN unnest(%s::text[], %s::text[], %s::int[]) AS t(term, pattern, lim)
+    CROSS JOIN LATERAL (
+        SELECT data, timestamp, category FROM records
+        WHERE device_id = dev.device_id AND category IN ('chats','emails') AND searchable LIKE t.pattern
+        LIMIT t.lim
+    ) r
+"""
+
+_CRITICAL_DATE_RECORDS_SQL = """
+    SELECT dev.device_id, cd.date_str, cat.category, r.data
+    FROM unnest(%s::text[]) AS dev(device_id)
+    CROSS JOIN unnest(%s::text[]) AS cd(date_str)
+    CROSS JOIN unnest(ARRAY['chats', 'locations']) AS cat(category)
+    CROSS JOIN LATERAL (
+        SELECT data FROM records
+        WHERE device_id = dev.device_id AND category = cat.category AND substr(timestamp, 1, 10) = cd.date_str
+        LIMIT 3
+    ) r
+"""
+
+# Contact names (trimmed like str.strip) present on 2+ devices, in first-seen order
+_SHARED_CONTACTS_SQL = """
+    SELECT name, array_agg(DISTINCT device_id) AS devices
+    FROM (
+        SELECT id, device_id, btrim(data->>'name', E' \\t\\n\\r\\f\\v') AS name
+        FROM records WHERE category = 'contacts'
+    ) c
+    WHERE name <> ''
+    GROUP BY name
+    HAVING COUNT(DISTINCT device_id) >= 2
+    ORDER BY MIN(id)
+"""
+
+
 def scan_discoveries_from_db(conn, device_map):
     """Scan discoveries from SQLite records table. Much faster than re-parsing markdown."""
     discoveries = list(VERIFIED_DISCOVERIES)
@@ -450,19 +510,54 @@ def scan_discoveries_from_db(conn, device_map):
 
     # Critical dates
     critical_dates_list = list(CRITICAL_DATES.items())
+    device_ids = list(device_map)
+
+    # Fetch every rule's rows up front, grouped per device, then build discoveries
+    # in the same device/term/date order as before so ids stay stable
+    terms = high_terms_3 + high_terms_2
+    search_terms = [(term.lower(), term, 3 if term in high_terms_3 else 2) for term in terms]
+    term_rows = defaultdict(list)
+    cur.execute(_TERM_MATCHES_SQL, (
+        device_ids, terms, [f"%{term_lower}%" for term_lower, _, _ in search_terms],
+        [50] * len(high_terms_3) + [20] * len(high_terms_2),
+    ))
+    for r in cur.fetchall():
+        term_rows[(r["device_id"], r["term"])].append(r)
+
+    date_rows = defaultdict(list)
+    cur.execute(_CRITICAL_DATE_RECORDS_SQL, (device_ids, list(CRITICAL_DATES)))
+    for r in cur.fetchall():
+        date_rows[(r["device_id"], r["category"], r["date_str"])].append(r)
+
+    # Count-only rules: per-(device, date) call counts and per-device password counts
+    cur.execute(
+        "SELECT device_id, substr(timestamp, 1, 10) AS day, COUNT(*) AS count FROM records "
+        "WHERE category='calls' AND device_id = ANY(%s) AND substr(timestamp, 1, 10) = ANY(%s) GROUP BY 1, 2",
+        (device_ids, list(CRITICAL_DATES))
+    )
+    call_counts = {(r["device_id"], r["day"]): r["count"] for r in cur.fetchall()}
+    cur.execute(
+        "SELECT device_id, COUNT(*) AS count FROM records WHERE category='passwords' AND device_id = ANY(%s) GROUP BY 1",
+        (device_ids,)
+    )
+    password_counts = {r["device_id"]: r["count"] for r in cur.fetchall()}
+
+    search_rows = defaultdict(list)
+    cur.execute(
+        "SELECT device_id, data, timestamp FROM records WHERE category='searches' AND device_id = ANY(%s)", (device_ids,)
+    )
+    for r in cur.fetchall():
+        search_rows[r["device_id"]].append(r)
 
     for device_id, info in device_map.items():
         owner = info.get("owner", device_id)
 
         # --- 3-flame term matches in chats/emails (SQL LIKE) ---
         for term in high_terms_3:
-            rows = cur.execute(
-                "SELECT data, timestamp, category FROM records WHERE device_id=%s AND category IN ('chats','emails') AND searchable ILIKE %s LIMIT 50",
-                (device_id, f"%{term}%")
-            ).fetchall()
+            rows = term_rows[(device_id, term)]
             seen_dates = set()
             for r in rows:
-                rec = json.loads(r["data"])
+                rec = r["data"]
                 ts = r["timestamp"] or ""
                 date_key = ts[:10] if ts else "nodate"
                 if date_key in seen_dates:
@@ -482,13 +577,10 @@ def scan_discoveries_from_db(conn, device_map):
 
         # --- 2-flame term matches ---
         for term in high_terms_2:
-            rows = cur.execute(
-                "SELECT data, timestamp, category FROM records WHERE device_id=%s AND category IN ('chats','emails') AND searchable ILIKE %s LIMIT 20",
-                (device_id, f"%{term}%")
-            ).fetchall()
+            rows = term_rows[(device_id, term)]
             seen_dates = set()
             for r in rows:
-                rec = json.loads(r["data"])
+                rec = r["data"]
                 ts = r["timestamp"] or ""
                 date_key = ts[:10] if ts else "nodate"
                 if date_key in seen_dates:
@@ -507,12 +599,8 @@ def scan_discoveries_from_db(conn, device_map):
 
         # --- Critical date messages ---
         for date_str, (label, flames) in critical_dates_list:
-            rows = cur.execute(
-                "SELECT data, category FROM records WHERE device_id=%s AND category='chats' AND timestamp LIKE %s LIMIT 5",
-                (device_id, f"{date_str}%")
-            ).fetchall()
-            for r in rows[:3]:  # Max 3 per date per device
-                rec = json.loads(r["data"])
+            for r in date_rows[(device_id, "chats", date_str)]:  # Max 3 per date per device
+                rec = r["data"]
                 body = rec.get("body", "")[:500]
                 if len(body) < 10:
                     continue
@@ -528,10 +616,7 @@ def scan_discoveries_from_db(conn, device_map):
 
         # --- Critical date calls ---
         for date_str, (label, flames) in critical_dates_list:
-            count = cur.execute(
-                "SELECT COUNT(*) as count FROM records WHERE device_id=%s AND category='calls' AND timestamp LIKE %s",
-                (device_id, f"{date_str}%")
-            ).fetchone()['count']
+            count = call_counts.get((device_id, date_str))
             if count:
                 disc_id += 1
                 discoveries.append({
@@ -546,12 +631,9 @@ def scan_discoveries_from_db(conn, device_map):
 
         # --- Critical date locations ---
         for date_str, (label, flames) in critical_dates_list:
-            rows = cur.execute(
-                "SELECT data FROM records WHERE device_id=%s AND category='locations' AND timestamp LIKE %s LIMIT 3",
-                (device_id, f"{date_str}%")
-            ).fetchall()
+            rows = date_rows[(device_id, "locations", date_str)]
             if rows:
-                locs = [json.loads(r["data"]) for r in rows]
+                locs = [r["data"] for r in rows]
                 addrs = [l.get("address", "") for l in locs if l.get("address")]
                 disc_id += 1
                 discoveries.append({
@@ -566,19 +648,16 @@ def scan_discoveries_from_db(conn, device_map):
                 })
 
         # --- Suspicious searches ---
-        rows = cur.execute(
-            "SELECT data, timestamp FROM records WHERE device_id=%s AND category='searches'", (device_id,)
-        ).fetchall()
-        for r in rows:
-            rec = json.loads(r["data"])
+        for r in search_rows[device_id]:
+            rec = r["data"]
             query = rec.get("query", "")
             q_lower = query.lower()
             matched = []
             max_flames = 0
-            for term in high_terms_3 + high_terms_2:
-                if term.lower() in q_lower:
+            for term_lower, term, flames in search_terms:
+                if term_lower in q_lower:
                     matched.append(term)
-                    max_flames = max(max_flames, 3 if term in high_terms_3 else 2)
+                    max_flames = max(max_flames, flames)
             for s in ["how to delete", "clear history", "delete messages", "factory reset"]:
                 if s in q_lower:
                     matched.append(s)
@@ -596,9 +675,7 @@ def scan_discoveries_from_db(conn, device_map):
                 })
 
         # --- Passwords ---
-        count = cur.execute(
-            "SELECT COUNT(*) as count FROM records WHERE device_id=%s AND category='passwords'", (device_id,)
-        ).fetchone()['count']
+        count = password_counts.get(device_id)
         if count:
             disc_id += 1
             discoveries.append({
@@ -610,21 +687,12 @@ def scan_discoveries_from_db(conn, device_map):
                 "tags": ["passwords", "credentials"], "data_type": "passwords",
             })
 
-    # --- Cross-device contacts ---
-    all_contacts = defaultdict(set)
-    rows = cur.execute("SELECT device_id, data FROM records WHERE category='contacts'").fetchall()
-    for r in rows:
-        rec = json.loads(r["data"])
-        name = rec.get("name", "").strip()
-        if name:
-            all_contacts[name].add(r["device_id"])
-
-    KEY_PEOPLE = ["Tina Peters", "Tina", "Wendi", "Woods", "Gerald Wood", "Sherronna", "Bishop",
-                  "Sandra Brown", "Sandye", "Belinda", "Knisley", "Joy Quinn", "Zachary"]
-    for name, devices in all_contacts.items():
-        if len(devices) < 2:
-            continue
-        is_key = any(kp.lower() in name.lower() for kp in KEY_PEOPLE)
+    # --- Cross-device contacts (grouped server-side) ---
+    cur.execute(_SHARED_CONTACTS_SQL)
+    for r in cur.fetchall():
+        name, devices = r["name"], r["devices"]
+        name_lower = name.lower()
+        is_key = any(kp in name_lower for kp in _KEY_PEOPLE_LOWER)
         flames = 3 if is_key else 1
         if flames >= 2 or len(devices) >= 3:
             disc_id += 1
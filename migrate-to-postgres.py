@@ -24,6 +24,9 @@ def create_postgres_schema(pg_conn):
         cur.execute("DROP TABLE IF EXISTS records CASCADE;")
         cur.execute("DROP TABLE IF EXISTS devices CASCADE;")
         
+        # Trigram indexes below back the LIKE/ILIKE '%term%' filters
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
         # Create tables (Postgres-compatible versions)
         cur.execute("""
             CREATE TABLE devices (
@@ -41,11 +44,15 @@ def create_postgres_schema(pg_conn):
                 device_id TEXT NOT NULL,
                 category TEXT NOT NULL,
                 timestamp TEXT,
-                data TEXT NOT NULL,
+                data JSONB NOT NULL,
                 searchable TEXT NOT NULL
             );
             CREATE INDEX idx_device_cat ON records(device_id, category);
             CREATE INDEX idx_timestamp ON records(timestamp);
+            CREATE INDEX idx_records_ts_id ON records(timestamp DESC, id DESC);
+            CREATE INDEX idx_records_dev_cat_ts_id ON records(device_id, category, timestamp DESC, id DESC);
+            CREATE INDEX idx_records_dev_cat_day ON records(device_id, category, (substr(timestamp, 1, 10)));
+            CREATE INDEX idx_records_searchable_trgm ON records USING gin (searchable gin_trgm_ops);
         """)
         
         cur.execute("""
@@ -76,12 +83,14 @@ def create_postgres_schema(pg_conn):
                 content TEXT,
                 timestamp TEXT,
                 verified INTEGER DEFAULT 0,
-                tags TEXT,
+                tags JSONB,
                 data_type TEXT,
                 source_app TEXT
             );
             CREATE INDEX idx_disc_flames ON discoveries(flames DESC);
             CREATE INDEX idx_disc_cat ON discoveries(category);
+            CREATE INDEX idx_disc_owner_trgm ON discoveries USING gin (owner gin_trgm_ops);
+            CREATE INDEX idx_disc_tags_trgm ON discoveries USING gin ((tags::text) gin_trgm_ops);
         """)
         
         cur.execute("""
@@ -98,6 +107,9 @@ def create_postgres_schema(pg_conn):
                 last_message_preview TEXT
             );
             CREATE INDEX idx_threads_device ON chat_threads(device_id);
+            CREATE INDEX idx_threads_participants_trgm ON chat_threads USING gin (participants gin_trgm_ops);
+            CREATE INDEX idx_threads_preview_trgm ON chat_threads USING gin (last_message_preview gin_trgm_ops);
+            CREATE INDEX idx_threads_source_trgm ON chat_threads USING gin (source_app gin_trgm_ops);
         """)
         
         cur.execute("""
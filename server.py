@@ -9,13 +9,19 @@ setup_logging()
 from fastapi import FastAPI, Request, Response, Depends, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse as RecordsResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as RecordsResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from db import db
 from search_api import rag_search, chat_with_evidence
 from network_builder import get_cached_network, get_person_details
 from legal_scanner import get_case_index, read_legal_file, LEGAL_BASE
-from auth import auth_manager, VALID_ROLES
+from auth import get_auth_manager, VALID_ROLES
 
 app = FastAPI(title="Evidence Browser")
 
@@ -55,7 +61,7 @@ async def auth_middleware(request: Request, call_next):
                 media_type="application/json"
             )
 
-        user = auth_manager.validate_session(token)
+        user = get_auth_manager().validate_session(token)
         if not user:
             return Response(
                 content='{"detail":"Invalid or expired session"}',
@@ -126,7 +132,9 @@ class ResetPasswordRequest(BaseModel):
 async def login(req: LoginRequest, request: Request):
     ip = request.client.host if request.client else None
     ua = request.headers.get("user-agent", "")
-    result = auth_manager.login(req.username, req.password, ip=ip, user_agent=ua)
+    # bcrypt releases the GIL; run it on the worker pool so logins use all
+    # cores instead of blocking the event loop for the whole hash
+    result = await run_in_threadpool(get_auth_manager().login, req.username, req.password, ip=ip, user_agent=ua)
     if not result:
         raise HTTPException(status_code=401, detail="Invalid credentials or account locked")
     return result
@@ -135,7 +143,7 @@ async def login(req: LoginRequest, request: Request):
 async def logout(request: Request):
     token = getattr(request.state, 'token', None)
     if token:
-        auth_manager.logout(token)
+        get_auth_manager().logout(token)
     return {"ok": True}
 
 @app.get("/api/auth/me")
@@ -156,13 +164,14 @@ async def auth_check(request: Request):
 @app.get("/api/admin/users")
 async def admin_list_users(request: Request):
     require_admin(request)
-    return auth_manager.list_users()
+    return get_auth_manager().list_users()
 
 @app.post("/api/admin/users")
 async def admin_create_user(req: CreateUserRequest, request: Request):
     require_admin(request)
     try:
-        return auth_manager.create_user(
+        return await run_in_threadpool(
+            get_auth_manager().create_user,
             username=req.username, password=req.password, role=req.role,
             display_name=req.display_name, email=req.email
         )
@@ -173,7 +182,7 @@ async def admin_create_user(req: CreateUserRequest, request: Request):
 async def admin_update_user(user_id: str, req: UpdateUserRequest, request: Request):
     require_admin(request)
     try:
-        result = auth_manager.update_user(
+        result = get_auth_manager().update_user(
             user_id, display_name=req.display_name, email=req.email,
             role=req.role, is_active=req.is_active if req.is_active is not None else None
         )
@@ -188,22 +197,22 @@ async def admin_delete_user(user_id: str, request: Request):
     admin = require_admin(request)
     if user_id == admin['id']:
         raise HTTPException(status_code=400, detail="Cannot deactivate yourself")
-    auth_manager.deactivate_user(user_id)
+    get_auth_manager().deactivate_user(user_id)
     return {"ok": True}
 
 @app.post("/api/admin/users/{user_id}/reset-password")
 async def admin_reset_password(user_id: str, req: ResetPasswordRequest, request: Request):
     require_admin(request)
     try:
-        auth_manager.reset_password(user_id, req.password)
+        await run_in_threadpool(get_auth_manager().reset_password, user_id, req.password)
         return {"ok": True}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/admin/login-history")
-async def admin_login_history(request: Request, limit: int = 100):
+async def admin_login_history(request: Request, limit: int = 100, offset: int = 0):
     require_admin(request)
-    return auth_manager.get_login_history(limit=limit)
+    return get_auth_manager().get_login_history(limit=limit, offset=offset)
 
 
 # ─── Existing Endpoints ───
@@ -234,15 +243,21 @@ class ChatRequest(BaseModel):
 
 @app.on_event("startup")
 async def startup():
+    db.init_schema()
     db.full_index()
-    db.start_watcher(interval=30)
+    db.start_watcher()
     # Ensure default admin
-    password = auth_manager.ensure_admin_exists()
+    password = get_auth_manager().ensure_admin_exists()
     if password:
         print(f"\n⚠️  Default admin created. Username: admin, Password: {password}")
         print(f"⚠️  Change this immediately!\n")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    get_auth_manager().close()
+
+
 # ─── Stats / Devices ───
 @app.get("/api/stats")
 async def get_stats():
@@ -252,22 +267,24 @@ async def get_stats():
 async def get_devices():
     return db.get_devices()
 
+# Record-heavy endpoints return their dicts as a ready response: this skips FastAPI's
+# jsonable_encoder walk and encodes with orjson when it is installed
 @app.get("/api/device/{device_id}")
-async def get_device(device_id: str, category: str = None, page: int = 1, per_page: int = 50, q: str = None, date_from: str = None, date_to: str = None):
-    return db.get_device_data(device_id, category=category, page=page, per_page=per_page, query=q, date_from=date_from, date_to=date_to)
+async def get_device(device_id: str, category: str = None, page: int = 1, per_page: int = 50, q: str = None, date_from: str = None, date_to: str = None, cursor: str = None, exact_count: bool = False):
+    return RecordsResponse(db.get_device_data(device_id, category=category, page=page, per_page=per_page, query=q, date_from=date_from, date_to=date_to, cursor=cursor, exact_count=exact_count))
 
 @app.get("/api/device/{device_id}/chat-threads")
 async def get_chat_threads(device_id: str, page: int = 1, per_page: int = 50, search: str = None, date_from: str = None, date_to: str = None):
-    return db.get_chat_threads(device_id, page=page, per_page=per_page, search=search, date_from=date_from, date_to=date_to)
+    return RecordsResponse(db.get_chat_threads(device_id, page=page, per_page=per_page, search=search, date_from=date_from, date_to=date_to))
 
 @app.get("/api/device/{device_id}/chat-thread/{thread_id}")
 async def get_thread_messages(device_id: str, thread_id: int):
-    return db.get_thread_messages(device_id, thread_id)
+    return RecordsResponse(db.get_thread_messages(device_id, thread_id))
 
 # ─── Search ───
 @app.get("/api/search")
-async def search(q: str, device: str = None, category: str = None, page: int = 1, per_page: int = 50):
-    return db.search_all(q, device_filter=device, category_filter=category, page=page, per_page=per_page)
+async def search(q: str, device: str = None, category: str = None, page: int = 1, per_page: int = 50, cursor: str = None, exact_count: bool = False):
+    return RecordsResponse(db.search_all(q, device_filter=device, category_filter=category, page=page, per_page=per_page, cursor=cursor, exact_count=exact_count))
 
 @app.get("/api/rag-search")
 async def semantic_search(q: str, top: int = 20):
@@ -276,7 +293,7 @@ async def semantic_search(q: str, top: int = 20):
 # ─── Discoveries ───
 @app.get("/api/discoveries")
 async def discoveries(category: str = "all", person: str = "all", sort: str = "importance", page: int = 1, per_page: int = 50):
-    return db.get_discoveries(category=category, person=person, sort=sort, page=page, per_page=per_page)
+    return RecordsResponse(db.get_discoveries(category=category, person=person, sort=sort, page=page, per_page=per_page))
 
 # ─── Refresh / Status ───
 @app.post("/api/refresh")